@@ -1,17 +1,24 @@
 import asyncio
 import inspect
+import itertools
 import json
 import logging
 import os
 import random
+import re
 import time
 import traceback
-from functools import wraps
+from dataclasses import asdict, dataclass, field, is_dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Union, Tuple
 
+import numpy as np
+import orjson
+
 from person import Person
 from entity import Entity
+from game_object import GameObject
 
 try:
     from agents import Agent, Runner, function_tool, RunContextWrapper
@@ -21,8 +28,8 @@ except ImportError:
     print("Installation might be like: pip install openai-agents (check the actual package name)")
     raise
 try:
-    from openai import AsyncOpenAI, OpenAI, OpenAIError, BadRequestError  # Import specific error
-    from pydantic import BaseModel, Field, ValidationError
+    from openai import OpenAI
+    from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter, ValidationError
 except ImportError:
     print("\nERROR: Could not import 'openai' or 'pydantic'.")
     print("Please install them (`pip install openai pydantic`).")
@@ -76,6 +83,7 @@ OUTPUT_DIR = Path("./game_output")
 DEFAULT_THEME = "Mysterious Island Survival"
 MAP_SIZE_RANGE = (30, 50)
 AGENT_MODEL = "gpt-4o"
+_THEME_SANITIZER = re.compile(r"[^\w-]")
 
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -94,10 +102,11 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class Position(BaseModel):
+@dataclass(frozen=True, slots=True)
+class Position:
+    """Immutable (x, y) grid coordinate; a plain value object, not a schema model."""
     x: int
     y: int
-    model_config = {"json_schema_extra": {"example": {"x": 10, "y": 15}}}
 
     def to_tuple(self) -> Tuple[int, int]:
         return (self.x, self.y)
@@ -107,6 +116,9 @@ class Position(BaseModel):
         return cls(x=pos_tuple[0], y=pos_tuple[1])
 
 
+_ENV_VERSIONS = itertools.count(1) # Shared so a version stamp never repeats across environments
+
+
 class Environment(BaseModel):
     width: int
     height: int
@@ -114,7 +126,32 @@ class Environment(BaseModel):
     entity_map: Dict[str, 'Entity'] = Field(default_factory=dict, exclude=True) # Map entity ID to entity
     position_map: Dict[tuple[int, int], List['Entity']] = Field(default_factory=dict, exclude=True) # Map (x, y) to list of entities
     model_config = {"json_schema_extra": {"example": {"width": 10, "height": 10, "grid": [[0, 1], [1, 0]]}}}
-    
+    _grid_array: Optional[np.ndarray] = PrivateAttr(default=None) # uint8 view of grid, built on first use
+    _version: int = PrivateAttr(default_factory=lambda: next(_ENV_VERSIONS)) # Re-stamped on every entity change
+
+    @classmethod
+    def from_array(cls, grid_array: np.ndarray) -> 'Environment':
+        """Build an environment from a trusted (height, width) 0/1 array without re-validating each cell."""
+        height, width = grid_array.shape
+        env = cls.model_construct(width=width, height=height, grid=grid_array.tolist())
+        env._grid_array = grid_array
+        return env
+
+    @property
+    def grid_array(self) -> np.ndarray:
+        """The grid as a (height, width) uint8 array; `grid` stays the serialized form."""
+        if self._grid_array is None:
+            self._grid_array = np.asarray(self.grid, dtype=np.uint8)
+        return self._grid_array
+
+    @property
+    def version(self) -> int:
+        """Process-unique stamp for the current entity layout; changes on every add, remove or move."""
+        return self._version
+
+    def _touch(self) -> None:
+        self._version = next(_ENV_VERSIONS)
+
     def is_valid_position(self, position) -> bool:
         """Check if a position is within the bounds of the environment.
         
@@ -124,13 +161,10 @@ class Environment(BaseModel):
         Returns:
             bool: True if the position is valid, False otherwise
         """
-        if hasattr(position, 'x') and hasattr(position, 'y'):
-            x, y = position.x, position.y
-        elif isinstance(position, (tuple, list)) and len(position) >= 2:
-            x, y = position[0], position[1]
-        else:
+        xy = self._position_xy(position)
+        if xy is None:
             return False
-            
+        x, y = xy
         return 0 <= x < self.width and 0 <= y < self.height
     
     def can_move_to(self, position) -> bool:
@@ -142,17 +176,16 @@ class Environment(BaseModel):
         Returns:
             bool: True if the position is valid and traversable, False otherwise
         """
-        if not self.is_valid_position(position):
+        xy = self._position_xy(position)
+        if xy is None:
             return False
-            
-        if hasattr(position, 'x') and hasattr(position, 'y'):
-            x, y = position.x, position.y
-        else:
-            x, y = position[0], position[1]
-            
+        x, y = xy
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return False
+
         try:
-            return self.grid[x][y] == 1  # Assuming 1 means traversable
-        except IndexError:
+            return bool(self.grid_array[y, x] == 1)  # Assuming 1 means traversable
+        except (IndexError, ValueError):
             return False
     
     def get_entities_at(self, position) -> List['Entity']:
@@ -169,35 +202,44 @@ class Environment(BaseModel):
             return []
         return list(self.position_map.get(pos_tuple, []))
 
-    def get_object_at(self, position) -> Optional['GameObject']:
+    def get_object_at(self, position) -> Optional[GameObject]:
         """Get the first GameObject at a position, if any.
         
         Args:
             position: A tuple or list with (x, y) coordinates, or an object with x and y attributes
             
         Returns:
-            Optional['GameObject'] at the position or None if not found
+            Optional[GameObject] at the position or None if not found
         """
-        entities = self.get_entities_at(position)
-        for entity in entities:
-            try:
-                from game_object import GameObject # Lazy import for type check if needed
-                if isinstance(entity, GameObject):
-                    return entity
-            except ImportError:
-                if 'GameObject' in str(type(entity)): # Less reliable check
-                     return entity # type: ignore
+        pos_tuple = self._normalize_position(position)
+        if pos_tuple is None:
+            return None
+        # Read the position index directly; no copy of the tile's entity list is needed
+        for entity in self.position_map.get(pos_tuple, ()):
+            if isinstance(entity, GameObject):
+                return entity
         return None
 
-    def _normalize_position(self, position: Any) -> Optional[tuple[int, int]]:
-        """Converts various position inputs to a standard (x, y) tuple."""
-        if hasattr(position, 'x') and hasattr(position, 'y'):
+    @staticmethod
+    def _position_xy(position: Any) -> Optional[tuple[int, int]]:
+        """Return (x, y) for a tuple/list, Position or any object with x and y, else None."""
+        # Concrete types first: isinstance is a single type check, hasattr probes raise internally
+        if isinstance(position, tuple) and len(position) >= 2:
+            return (position[0], position[1])
+        if isinstance(position, Position):
             return (position.x, position.y)
-        elif isinstance(position, (tuple, list)) and len(position) >= 2:
+        if isinstance(position, list) and len(position) >= 2:
             return (position[0], position[1])
-        else:
+        if hasattr(position, 'x') and hasattr(position, 'y'):
+            return (position.x, position.y)
+        return None
+
+    def _normalize_position(self, position: Any) -> Optional[tuple[int, int]]:
+        """Converts various position inputs to a standard (x, y) tuple."""
+        xy = self._position_xy(position)
+        if xy is None:
             logger.warning(f"Invalid position format received: {position!r}")
-            return None
+        return xy
 
     def add_entity(self, entity: 'Entity', position: Optional[Union[Position, tuple[int, int]]] = None) -> bool:
         """Adds an entity to the environment at the specified position."""
@@ -228,6 +270,7 @@ class Environment(BaseModel):
              self.position_map[pos_tuple] = []
         if entity not in self.position_map[pos_tuple]:
             self.position_map[pos_tuple].append(entity)
+        self._touch()
         return True
 
     def remove_entity(self, entity: 'Entity') -> bool:
@@ -247,6 +290,7 @@ class Environment(BaseModel):
                     del self.position_map[pos_tuple]
 
         del self.entity_map[entity_id]
+        self._touch()
         return True
 
     def move_entity(self, entity: 'Entity', new_position: Union[Position, tuple[int, int]]) -> bool:
@@ -283,6 +327,7 @@ class Environment(BaseModel):
             self.position_map[new_pos_tuple].append(entity)
 
         self.entity_map[entity.id] = entity
+        self._touch()
 
         return True
 
@@ -310,13 +355,18 @@ class GameData(BaseModel):
     border_size: int
 
 
-class CopywriterContext(BaseModel):
+@dataclass(slots=True)
+class CopywriterContext:
+    """Mutable run state shared by the copywriter tools."""
     theme: Optional[str] = None
     environment: Optional[Environment] = None
     entities: Optional[List[Entity]] = None
     entity_library: Optional[List[EntityModel]] = None
-    entity_descriptions: Dict[str, str] = Field(default_factory=dict)
-    story_components: Dict[str, Any] = Field(default_factory=dict)
+    entity_descriptions: Dict[str, str] = field(default_factory=dict)
+    story_components: Dict[str, Any] = field(default_factory=dict)
+
+
+_CONTEXT_ADAPTER = TypeAdapter(CopywriterContext)
 
 
 class ObjectCounts(BaseModel):
@@ -445,26 +495,77 @@ def _get_default_object_counts() -> Dict[str, int]:
             "log_stool": 4, "campfire_spit": 2, "campfire_pot": 2, "pot": 5}
 
 
-def _generate_entity_id(prefix: str) -> str:
-    return f"{prefix}_{random.randint(10000, 99999)}_{int(time.time() * 1000)}"
+# Spawn dispatch per entity type: (factory, variant kwarg, variant choices, may spawn on water).
+# Factories are called directly; types with a variant kwarg get a randomly drawn variant.
+_ENTITY_FACTORIES: Dict[str, Tuple[Callable, Optional[str], Tuple[str, ...], bool]] = {
+    "chest": (ChestFactory.create_chest, "chest_type", ("basic_wooden", "forestwood", "bronze_banded"), False),
+    "obstacle": (create_land_obstacle, "obstacle_type", ("rock", "plant", "log", "stump", "hole", "tree"), True),
+    "backpack": (BackpackFactory.create_backpack, None, (), False),
+    "firewood": (FirewoodFactory.create_firewood, None, (), False),
+    "tent": (TentFactory.create_tent, None, (), False),
+    "bedroll": (BedrollFactory.create_bedroll, None, (), False),
+    "log_stool": (LogStoolFactory.create_stool, None, (), False),
+    "campfire_spit": (CampfireSpitFactory.create_campfire_spit, None, (), False),
+    "campfire_pot": (CampfirePotFactory.create_pot, "pot_type", ("tripod",), False),
+    "pot": (PotFactory.create_pot, "size", ("small", "medium", "big"), True),
+    "campfire": (CampfireFactory.create_campfire, None, (), False),
+} if FACTORY_GAME_AVAILABLE else {}
+
+
+def _generate_entity_ids(prefix: str, count: int) -> List[str]:
+    ts = int(time.time() * 1000)
+    return [f"{prefix}_{n}_{ts}" for n in np.random.randint(10000, 100000, size=count).tolist()]
+
+
+@lru_cache(maxsize=4096)
+def _entity_description_key(type: str, variant: Optional[str], state: Optional[str]) -> str:
+    return f"{type}_{variant or 'default'}_{state or 'default'}"
+
+
+def _story_filename(theme: str) -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{_THEME_SANITIZER.sub('_', theme)}.json"
+
+
+def _write_story_json(result: CompleteStoryResult, path: Path) -> None:
+    path.write_bytes(result.model_dump_json(exclude_none=True, indent=2).encode("utf-8"))
+
+
+def _ensure_context(ctx: RunContextWrapper[CopywriterContext]) -> CopywriterContext:
+    if not ctx.context:
+        ctx.context = CopywriterContext()
+    return ctx.context
+
+
+# Factory result type -> function turning an instance into a dict (None if unconvertible).
+_ENTITY_CONVERTERS: Dict[type, Callable[[Any], Optional[Dict[str, Any]]]] = {}
+
+
+def _resolve_entity_converter(obj: Any) -> Callable[[Any], Optional[Dict[str, Any]]]:
+    if isinstance(obj, BaseModel):
+        return lambda o: o.model_dump(exclude_none=True, by_alias=True)
+    elif isinstance(obj, dict):
+        return lambda o: o
+    elif hasattr(obj, 'to_dict'):
+        logger.warning(f"Using legacy 'to_dict' for {type(obj)}")
+        return lambda o: o.to_dict()
+    elif is_dataclass(obj):
+        return asdict
+    elif hasattr(obj, '__dict__'):
+        logger.warning(f"Using vars() for {type(obj)}")
+        return lambda o: dict(vars(o)) # Copy, so id defaults never land on the factory object
+    else:
+        logger.warning(f"Cannot convert factory result {type(obj)}")
+        return lambda o: None
 
 
 def _safe_entity_factory_call(factory_func: Callable, **kwargs) -> Optional[Dict[str, Any]]:
     try:
         obj = factory_func(**kwargs)
-        if isinstance(obj, BaseModel):
-            return obj.model_dump(exclude_none=True, by_alias=True)
-        elif isinstance(obj, dict):
-            return obj
-        elif hasattr(obj, 'to_dict'):
-            logger.warning(f"Using legacy 'to_dict' for {type(obj)}")
-            return obj.to_dict()
-        elif hasattr(obj, '__dict__'):
-            logger.warning(f"Using vars() for {type(obj)}")
-            return vars(obj)
-        else:
-            logger.warning(f"Cannot convert factory result {type(obj)}")
-            return None
+        obj_type = type(obj)
+        converter = _ENTITY_CONVERTERS.get(obj_type)
+        if converter is None:
+            converter = _ENTITY_CONVERTERS[obj_type] = _resolve_entity_converter(obj)
+        return converter(obj)
     except NotImplementedError as nie:
         logger.error(f"Factory missing impl: {nie}")
         return None
@@ -473,46 +574,35 @@ def _safe_entity_factory_call(factory_func: Callable, **kwargs) -> Optional[Dict
         return None
 
 
-async def _create_entity_instance(
+def _create_entity_instance(
         type: str,
         factory: Callable,
-        positions: List[tuple[int, int]],
-        lock: asyncio.Lock,
+        pos: tuple[int, int],
+        entity_id: str,
         **kwargs
 ) -> Optional[Entity]:
-    pos = None
-    async with lock:
-        if positions:
-            pos = positions.pop(random.randrange(len(positions)))
-            logger.debug(f"Pos {pos} for {type} ({len(positions)} left).")
-        else:
-            logger.warning(f"No positions left for {type}.")
-            return None
-    if pos is None:
-        return None  # Should not happen if lock logic is correct, but safeguard
-
     x, y = pos
     data = _safe_entity_factory_call(factory, **kwargs)
     if data:
         try:
             data["type"] = data.get("type", type)
-            data["id"] = data.get("id", _generate_entity_id(type))
+            data.setdefault("id", entity_id)
             data["position"] = (x, y)
             if "name" not in data:
                 data["name"] = f"{data.get('variant', 'Std')} {type.replace('_', ' ').title()}"
-            logger.debug(f"Validating {type}: {data}")
+            logger.debug("Validating %s: %s", type, data)
             validated = Entity.model_validate(data)
-            logger.debug(f"Validated {type} id {validated.id}")
+            logger.debug("Validated %s id %s", type, validated.id)
             return validated
         except ValidationError as e:
-            logger.error(f"Validation fail {type} @({x},{y}): {e}", exc_info=False)
+            logger.error("Validation fail %s @(%s,%s): %s", type, x, y, e, exc_info=False)
             logger.error(f"--> Data: {json.dumps(data, default=str)}")
             return None
         except Exception as e:
-            logger.error(f"Finalizing error {type}: {e}", exc_info=True)
+            logger.error("Finalizing error %s: %s", type, e, exc_info=True)
             return None
     else:  # data is None
-        logger.warning(f"Factory call for {type} returned None.")
+        logger.warning("Factory call for %s returned None.", type)
         return None
 
 
@@ -520,9 +610,9 @@ def generate_terrain_description(env: Optional[Environment]) -> str:
     if not env or not env.grid:
         return "Mysterious landscape."
     total = getattr(env, 'width', 0) * getattr(env, 'height', 0)
-    land_c = sum(sum(r) for r in env.grid)
     if total == 0:
         return "Empty void."
+    land_c = int(env.grid_array.sum())
     perc = (land_c / total) * 100
     if perc > 95:
         t = "Vast continent"
@@ -561,9 +651,7 @@ async def generate_complete_game_world(
             entities=[], entity_descriptions={}, error="factory_game missing."
         )
 
-    if not ctx.context:
-        ctx.context = CopywriterContext()
-    context = ctx.context
+    context = _ensure_context(ctx)
     context.theme = theme
     actual_map_size = map_size
     actual_border_size = border_size
@@ -572,9 +660,10 @@ async def generate_complete_game_world(
     try:
         logger.debug("Generating map...")
         symbol_grid = generate_island_map(size=actual_map_size, border_size=actual_border_size)
-        binary_grid = [[1 if cell == LAND_SYMBOL else 0 for cell in row] for row in symbol_grid]
-        logger.debug(f"Map {len(binary_grid)}x{len(binary_grid[0]) if binary_grid else 0}. Validating Env.")
-        environment = Environment(width=actual_map_size, height=actual_map_size, grid=binary_grid)
+        land_mask = np.asarray(symbol_grid) == LAND_SYMBOL
+        logger.debug(f"Map {land_mask.shape[0]}x{land_mask.shape[1]}. Building Env.")
+        # The grid comes straight from the mask above, so skip re-validating every cell.
+        environment = Environment.from_array(land_mask.astype(np.uint8))
         context.environment = environment
         logger.debug("Environment stored.")
 
@@ -585,88 +674,71 @@ async def generate_complete_game_world(
         else:
             logger.info(f"Using default counts: {counts_dict}")
 
-        land_pos = [(x, y) for y, r in enumerate(binary_grid) for x, c in enumerate(r) if c == 1]
-        water_pos = [(x, y) for y, r in enumerate(binary_grid) for x, c in enumerate(r) if c == 0]
-        logger.debug(f"Positions: {len(land_pos)} land, {len(water_pos)} water.")
+        # (x, y) coordinate arrays; water-capable types draw from land and water combined.
+        land_rows, land_cols = np.nonzero(land_mask)
+        water_rows, water_cols = np.nonzero(~land_mask)
+        land_xy = np.column_stack((land_cols, land_rows))
+        any_xy = np.concatenate((land_xy, np.column_stack((water_cols, water_rows))))
+        rng = np.random.default_rng()
+        logger.debug(f"Positions: {len(land_xy)} land, {len(any_xy) - len(land_xy)} water.")
 
-        lock = asyncio.Lock()
-        tasks = []
+        valid_entities: List[Entity] = []
+        obj_type_set = set()
+        exceptions = []
         total_scheduled = 0
 
-        def _obstacle_factory():
-            obstacle_type = random.choice(["rock", "plant", "log", "stump", "hole", "tree"])
-            return create_land_obstacle(obstacle_type)  # Pass the chosen type
-
-        factories = {  # Ensure factories exist & return valid data/models
-            "chest": (lambda: ChestFactory.create_chest(
-                chest_type=random.choice(["basic_wooden", "forestwood", "bronze_banded"])), False),
-            "obstacle": (_obstacle_factory, True),
-            "backpack": (BackpackFactory.create_backpack, False),
-            "firewood": (FirewoodFactory.create_firewood, False),
-            "tent": (TentFactory.create_tent, False),
-            "bedroll": (BedrollFactory.create_bedroll, False),
-            "log_stool": (LogStoolFactory.create_stool, False),
-            "campfire_spit": (CampfireSpitFactory.create_campfire_spit, False),
-            "campfire_pot": (lambda: CampfirePotFactory.create_pot("tripod"), False),
-            "pot": (lambda size=random.choice(["small", "medium", "big"]): PotFactory.create_pot(size), True),
-            "campfire": (CampfireFactory.create_campfire, False),
-        }
-        logger.debug("Setting up entity tasks...")
+        logger.debug("Creating entities...")
         for type, count in counts_dict.items():
             if count <= 0:
                 continue
-            factory_tuple = factories.get(type)
-            if not factory_tuple:
-                logger.warning(f"Skip {type}: No factory.")
+            factory_entry = _ENTITY_FACTORIES.get(type)
+            if not factory_entry:
+                logger.warning("Skip %s: No factory.", type)
                 continue
 
-            factory, water_ok = factory_tuple
-            available_positions = list(land_pos)  # Copy land positions
-            if water_ok:
-                available_positions.extend(list(water_pos))  # Add copy of water positions
-
-            if not available_positions:
-                logger.warning(f"Skip {type}: No valid positions available.")
+            factory, variant_kwarg, variants, water_ok = factory_entry
+            candidates = any_xy if water_ok else land_xy
+            if not len(candidates):
+                logger.warning("Skip %s: No valid positions available.", type)
                 continue
 
-            random.shuffle(available_positions)
-
-            actual_cnt = min(count, len(available_positions))
+            actual_cnt = min(count, len(candidates))
             if actual_cnt < count:
                 logger.warning(
-                    f"Position shortage for {type}: Need={count}, Have={len(available_positions)}. Making {actual_cnt}.")
-
-            logger.debug(f"Creating {actual_cnt} task(s) for {type}...")
-            positions_for_tasks = available_positions[:actual_cnt]
-            for _ in range(actual_cnt):
-                tasks.append(_create_entity_instance(type, factory, positions_for_tasks, lock))
+                    f"Position shortage for {type}: Need={count}, Have={len(candidates)}. Making {actual_cnt}.")
+            # Sample distinct cells directly instead of shuffling every candidate.
+            picked = candidates[rng.choice(len(candidates), size=actual_cnt, replace=False)]
+            positions = [(x, y) for x, y in picked.tolist()]
+
+            logger.debug("Creating %d %s entit(ies)...", actual_cnt, type)
+            if variant_kwarg:
+                factory_kwargs = [{variant_kwarg: v} for v in random.choices(variants, k=actual_cnt)]
+            else:
+                factory_kwargs = [{}] * actual_cnt
+            # Factory calls are synchronous, so build entities inline rather than
+            # scheduling a task per entity.
+            entity_ids = _generate_entity_ids(type, actual_cnt)
+            for pos, entity_id, kwargs in zip(positions, entity_ids, factory_kwargs):
                 total_scheduled += 1
-        logger.info(f"Total tasks scheduled: {total_scheduled}")
-
-        valid_entities: List[Entity] = []
-        exceptions = []
-        if tasks:
-            logger.debug(f"Gathering results from {len(tasks)} tasks...")
-            try:
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                logger.debug("Gather complete.")
-                for res in results:
-                    if isinstance(res, Entity):
-                        valid_entities.append(res)
-                    elif isinstance(res, Exception):
-                        exceptions.append(res)
-            except Exception as e:
-                logger.error(f"Gather error: {e}", exc_info=True)
-        else:
-            logger.warning("No tasks scheduled.")
+                try:
+                    entity = _create_entity_instance(type, factory, pos, entity_id, **kwargs)
+                except Exception as e:
+                    exceptions.append(e)
+                    continue
+                if entity is not None:
+                    valid_entities.append(entity)
+                    obj_type_set.add(entity.type)
+        logger.info(f"Total entities attempted: {total_scheduled}")
+        if not total_scheduled:
+            logger.warning("No entities scheduled.")
 
         failed_count = total_scheduled - len(valid_entities)
         logger.info(f"Entity creation: {len(valid_entities)} valid, {failed_count} failed/None.")
         for i, exc in enumerate(exceptions):
-            logger.error(f"  Task exception {i + 1}: {exc}",
+            logger.error(f"  Entity exception {i + 1}: {exc}",
                          exc_info=False)  # Keep exc_info False for cleaner logs unless debugging
         if not valid_entities and total_scheduled > 0:
-            logger.error("All entity tasks failed or returned None.")
+            logger.error("All entity creations failed or returned None.")
 
         context.entities = valid_entities
         if context.environment:
@@ -682,18 +754,18 @@ async def generate_complete_game_world(
              logger.error("Cannot populate environment: Environment object is missing in context.")
 
         logger.debug("Generating placeholder descriptions...")
-        entity_descriptions = {}
-        for e in valid_entities:
-            key = f"{e.type}_{e.variant or 'default'}_{e.state or 'default'}"
-            if key not in entity_descriptions:
-                entity_descriptions[key] = f"A {e.name or e.type}{f' ({e.state})' if e.state else ''}."
+        # One representative per kind (reversed so the first entity wins), then format each placeholder once.
+        first_of_kind = {_entity_description_key(e.type, e.variant, e.state): e for e in reversed(valid_entities)}
+        entity_descriptions = {
+            key: f"A {e.name or e.type}{f' ({e.state})' if e.state else ''}." for key, e in first_of_kind.items()
+        }
         context.entity_descriptions = entity_descriptions
         logger.debug(f"Generated/updated {len(entity_descriptions)} placeholders.")
 
-        land_c = sum(sum(r) for r in binary_grid)
+        land_c = int(land_mask.sum())
         total_c = actual_map_size * actual_map_size
         land_p = (land_c / total_c) * 100 if total_c > 0 else 0
-        obj_types = sorted(list(set(e.type for e in valid_entities)))
+        obj_types = sorted(obj_type_set)
         logger.info(f"Finalizing world gen: Entities={len(valid_entities)}, Types={obj_types}, Land={land_p:.1f}%")
 
         return f"Success: Generated world. Map={actual_map_size}x{actual_map_size}, Land={land_p:.1f}%, Entities={len(valid_entities)} ({failed_count} failed)."
@@ -714,92 +786,93 @@ async def generate_complete_game_world(
         )
 
 
+# Static catalogue returned by get_entity_library; built once at import time.
+# Author-controlled literals, so they are constructed without validation.
+_ENTITY_LIBRARY: Tuple[EntityModel, ...] = (
+    EntityModel.model_construct(type="chest", possible_states=["locked", "unlocked", "open", "closed", "empty", "full"],
+                                possible_actions=["open", "close", "lock", "unlock", "examine", "empty"],
+                                variants=["wooden", "iron", "ornate"], is_container=True, might_be_movable=True),
+    EntityModel.model_construct(type="rock", possible_states=["whole", "cracked", "broken"],
+                                possible_actions=["examine", "throw", "break", "gather"],
+                                variants=["small", "medium", "large", "mossy"], can_be_at_water=True,
+                                might_be_movable=True,
+                                might_be_jumpable=True, is_collectable=True),
+    EntityModel.model_construct(type="campfire",
+                                possible_states=["unlit", "smoldering", "burning", "dying", "extinguished"],
+                                possible_actions=["light", "extinguish", "add_fuel", "cook", "warm_up"],
+                                variants=["simple_pit", "stone_ring"], might_be_jumpable=True),
+    EntityModel.model_construct(type="tent", possible_states=["packed", "setup", "damaged"],
+                                possible_actions=["setup", "pack", "enter", "exit", "repair", "sleep"],
+                                variants=["small_canvas", "large_leather"], is_container=True),
+    EntityModel.model_construct(type="pot", possible_states=["empty", "full_water", "full_soup", "boiling", "dirty"],
+                                possible_actions=["fill", "empty", "cook", "drink", "clean", "examine"],
+                                variants=["clay", "iron", "copper"], can_be_at_water=True, might_be_movable=True,
+                                is_container=True),
+    EntityModel.model_construct(type="backpack", possible_states=["empty", "partially_full", "full"],
+                                possible_actions=["open", "close", "wear", "remove", "drop"],
+                                variants=["small_satchel", "medium_rucksack", "large_framepack"], is_container=True,
+                                is_collectable=True, is_wearable=True),
+    EntityModel.model_construct(type="bedroll", possible_states=["rolled", "unrolled"],
+                                possible_actions=["unroll", "roll", "sleep", "pickup"],
+                                variants=["straw", "wool", "fur"], might_be_movable=True, is_collectable=True),
+    EntityModel.model_construct(type="firewood", possible_states=["dry", "wet", "charred"],
+                                possible_actions=["gather", "add_to_fire", "drop"],
+                                variants=["kindling", "branch", "log"], might_be_movable=True, is_collectable=True),
+    EntityModel.model_construct(type="log_stool", possible_states=["default", "occupied"],
+                                possible_actions=["sit", "stand_up", "move"], variants=["short", "tall"],
+                                might_be_movable=True),
+    EntityModel.model_construct(type="obstacle", possible_states=["default", "cleared", "broken"],
+                                possible_actions=["examine", "climb", "jump_over", "destroy", "move"],
+                                variants=["boulder", "thorny_bush", "fallen_log", "deep_mud", "rubble"],
+                                can_be_at_water=True, might_be_jumpable=True),
+    EntityModel.model_construct(type="campfire_spit", possible_states=["empty", "cooking"],
+                                possible_actions=["attach_food", "remove_food", "examine"],
+                                variants=["wooden", "metal"], might_be_movable=True),
+    EntityModel.model_construct(type="campfire_pot", possible_states=["empty", "full_water", "cooking"],
+                                possible_actions=["fill", "empty", "cook", "serve"], variants=["tripod", "hanging"],
+                                might_be_movable=True, is_container=True)
+)
+
+
 @function_tool()
 async def get_entity_library(ctx: RunContextWrapper[CopywriterContext]) -> EntityLibraryResult:
     """Returns a predefined library of known entity types and their potential properties."""
-    definitions = [EntityModel(type="chest", possible_states=["locked", "unlocked", "open", "closed", "empty", "full"],
-                               possible_actions=["open", "close", "lock", "unlock", "examine", "empty"],
-                               variants=["wooden", "iron", "ornate"], is_container=True, might_be_movable=True),
-                   EntityModel(type="rock", possible_states=["whole", "cracked", "broken"],
-                               possible_actions=["examine", "throw", "break", "gather"],
-                               variants=["small", "medium", "large", "mossy"], can_be_at_water=True,
-                               might_be_movable=True,
-                               might_be_jumpable=True, is_collectable=True),
-                   EntityModel(type="campfire",
-                               possible_states=["unlit", "smoldering", "burning", "dying", "extinguished"],
-                               possible_actions=["light", "extinguish", "add_fuel", "cook", "warm_up"],
-                               variants=["simple_pit", "stone_ring"], might_be_jumpable=True),
-                   EntityModel(type="tent", possible_states=["packed", "setup", "damaged"],
-                               possible_actions=["setup", "pack", "enter", "exit", "repair", "sleep"],
-                               variants=["small_canvas", "large_leather"], is_container=True),
-                   EntityModel(type="pot", possible_states=["empty", "full_water", "full_soup", "boiling", "dirty"],
-                               possible_actions=["fill", "empty", "cook", "drink", "clean", "examine"],
-                               variants=["clay", "iron", "copper"], can_be_at_water=True, might_be_movable=True,
-                               is_container=True),
-                   EntityModel(type="backpack", possible_states=["empty", "partially_full", "full"],
-                               possible_actions=["open", "close", "wear", "remove", "drop"],
-                               variants=["small_satchel", "medium_rucksack", "large_framepack"], is_container=True,
-                               is_collectable=True, is_wearable=True),
-                   EntityModel(type="bedroll", possible_states=["rolled", "unrolled"],
-                               possible_actions=["unroll", "roll", "sleep", "pickup"],
-                               variants=["straw", "wool", "fur"], might_be_movable=True, is_collectable=True),
-                   EntityModel(type="firewood", possible_states=["dry", "wet", "charred"],
-                               possible_actions=["gather", "add_to_fire", "drop"],
-                               variants=["kindling", "branch", "log"], might_be_movable=True, is_collectable=True),
-                   EntityModel(type="log_stool", possible_states=["default", "occupied"],
-                               possible_actions=["sit", "stand_up", "move"], variants=["short", "tall"],
-                               might_be_movable=True),
-                   EntityModel(type="obstacle", possible_states=["default", "cleared", "broken"],
-                               possible_actions=["examine", "climb", "jump_over", "destroy", "move"],
-                               variants=["boulder", "thorny_bush", "fallen_log", "deep_mud", "rubble"],
-                               can_be_at_water=True, might_be_jumpable=True),
-                   EntityModel(type="campfire_spit", possible_states=["empty", "cooking"],
-                               possible_actions=["attach_food", "remove_food", "examine"],
-                               variants=["wooden", "metal"], might_be_movable=True),
-                   EntityModel(type="campfire_pot", possible_states=["empty", "full_water", "cooking"],
-                               possible_actions=["fill", "empty", "cook", "serve"], variants=["tripod", "hanging"],
-                               might_be_movable=True, is_container=True)
-                   ]
-    if not ctx.context:
-        ctx.context = CopywriterContext()
-    ctx.context.entity_library = definitions
+    definitions = list(_ENTITY_LIBRARY)
+    _ensure_context(ctx).entity_library = definitions
     return EntityLibraryResult(entity_library=definitions)
 
 
+def _coerce_entity_description(item: Any) -> Optional[EntityDescription]:
+    if isinstance(item, EntityDescription):
+        return item
+    try:
+        return EntityDescription.model_validate(item)
+    except (ValidationError, TypeError) as e:
+        logger.warning("Skipping invalid description item: %s - %r", e, item)
+        return None
+
+
 @function_tool()
 async def describe_entities_batch(
         ctx: RunContextWrapper[CopywriterContext], descriptions: List[EntityDescription]
 ) -> Union[EntityBatchDescriptionResult, str]:  # Return str on success
     """Adds/updates descriptions for multiple entity type/variant/state combinations."""
-    if not ctx.context:
-        ctx.context = CopywriterContext()
-    if not hasattr(ctx.context, 'entity_descriptions') or ctx.context.entity_descriptions is None:
-        ctx.context.entity_descriptions = {}
-
+    context = _ensure_context(ctx)
     added: Dict[str, str] = {}
     processed = 0
     try:
         if not isinstance(descriptions, list):
             raise TypeError("Input must be a list of EntityDescription objects.")
 
-        for item in descriptions:
-            desc_data = item
-            if not isinstance(item, EntityDescription):
-                try:
-                    desc_data = EntityDescription.model_validate(item)
-                except (ValidationError, TypeError) as e:
-                    logger.warning(f"Skipping invalid description item: {e} - {item!r}")
-                    continue
-
-            key = f"{desc_data.type}_{desc_data.variant or 'default'}_{desc_data.state or 'default'}"
-            ctx.context.entity_descriptions[key] = desc_data.description
-            added[key] = desc_data.description
-            processed += 1
+        validated = [d for d in map(_coerce_entity_description, descriptions) if d is not None]
+        added = {_entity_description_key(d.type, d.variant, d.state): d.description for d in validated}
+        context.entity_descriptions.update(added)
+        processed = len(added)
 
-        logger.info(f"Added/updated {processed} descriptions.")
+        logger.info("Added/updated %d descriptions.", processed)
         return f"Success: Processed {processed} entity descriptions."
     except Exception as e:
-        logger.error(f"Error in describe_entities_batch: {e}", exc_info=True)
+        logger.error("Error in describe_entities_batch: %s", e, exc_info=True)
         return EntityBatchDescriptionResult(
             success=False, processed_count=processed, descriptions_added=added,
             error=f"{type(e).__name__}: {e}"
@@ -811,11 +884,9 @@ async def craft_entity_interactions_batch(
         ctx: RunContextWrapper[CopywriterContext], interactions: List[Interaction]
 ) -> Union[InteractionBatchResult, str]:  # Return str on success
     """Adds multiple entity interaction narratives to the story components."""
-    if not ctx.context:
-        ctx.context = CopywriterContext()
-    if 'interactions' not in ctx.context.story_components or not isinstance(
-            ctx.context.story_components.get("interactions"), list):
-        ctx.context.story_components["interactions"] = []
+    story_components = _ensure_context(ctx).story_components
+    if not isinstance(story_components.get("interactions"), list):
+        story_components["interactions"] = []
 
     added: List[Interaction] = []
     processed = 0
@@ -832,7 +903,7 @@ async def craft_entity_interactions_batch(
                     logger.warning(f"Skipping invalid interaction item: {e} - {item!r}")
                     continue
 
-            ctx.context.story_components["interactions"].append(interact_data.model_dump(mode='json'))
+            story_components["interactions"].append(interact_data.model_dump(mode='json'))
             added.append(interact_data)  # Keep original model for the result
             processed += 1
 
@@ -853,9 +924,7 @@ async def generate_story_components(
         quest_reward: str, quest_required_entities: Optional[List[str]] = None
 ) -> Union[StoryComponentsResult, str]:  # Return str on success
     """Generates and adds the story introduction and main quest."""
-    if not ctx.context:
-        ctx.context = CopywriterContext()
-    context = ctx.context
+    context = _ensure_context(ctx)
     context.theme = theme  # Update theme in context if provided
     try:
         intro_text = f"You find yourself in '{location_description}'. The air holds a sense of {mood}. Theme: '{theme}'..."
@@ -913,11 +982,11 @@ async def complete_story(ctx: RunContextWrapper[CopywriterContext]) -> CompleteS
     context = ctx.context
     logger.info("Compiling final story...")
     try:
-        theme = getattr(context, 'theme', DEFAULT_THEME)
-        env = getattr(context, 'environment', None)
-        ents = getattr(context, 'entities', []) or []
-        descs = getattr(context, 'entity_descriptions', {}) or {}
-        comps = getattr(context, 'story_components', {}) or {}
+        theme = context.theme or DEFAULT_THEME
+        env = context.environment
+        ents = context.entities or []
+        descs = context.entity_descriptions  # Always a dict (default_factory)
+        comps = context.story_components
 
         if not isinstance(env, Environment) or not env.grid or env.width <= 0 or env.height <= 0:
             logger.error("Environment missing or invalid in context.")
@@ -977,9 +1046,10 @@ async def complete_story(ctx: RunContextWrapper[CopywriterContext]) -> CompleteS
             for interaction in interaction_data:
                 if isinstance(interaction, dict):  # Interactions stored as dicts
                     if shown_count < 5:
-                        action = interaction.get('action', 'interact').title()
-                        entity_type = interaction.get('entity_type', 'something')
-                        narration = interaction.get('narration', '...')
+                        get = interaction.get
+                        action = get('action', 'interact').title()
+                        entity_type = get('entity_type', 'something')
+                        narration = get('narration', '...')
                         parts.append(f"- {action} with {entity_type}: {narration}")
                         shown_count += 1
                     else:
@@ -1004,12 +1074,8 @@ async def complete_story(ctx: RunContextWrapper[CopywriterContext]) -> CompleteS
         )
 
         try:
-            timestamp = time.strftime("%Y%m%d-%H%M%S")
-            sanitized_theme = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in theme)
-            filename = f"{timestamp}-{sanitized_theme}.json"
-            output_path = OUTPUT_DIR / filename
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(result.model_dump(mode='json', exclude_none=True), f, indent=2, ensure_ascii=False)
+            output_path = OUTPUT_DIR / _story_filename(theme)
+            _write_story_json(result, output_path)
             logger.info(f"✅ Intermediate story result saved by complete_story: {output_path}")
         except Exception as save_err:
             logger.error(f"❌ Failed to save intermediate story result in complete_story: {save_err}", exc_info=True)
@@ -1038,8 +1104,34 @@ async def complete_story(ctx: RunContextWrapper[CopywriterContext]) -> CompleteS
         )
 
 
+_AGENT_TOOLS = (
+    generate_complete_game_world,
+    get_entity_library,  # Keep for potential context/reference, though not in main workflow
+    describe_entities_batch,
+    craft_entity_interactions_batch,
+    generate_story_components,
+    complete_story,
+)
+
+_WORKFLOW_PROMPT = f"""
+1. World Gen: Call `generate_complete_game_world` ONCE (map size {MAP_SIZE_RANGE[0]}-{MAP_SIZE_RANGE[1]}). If this tool returns an error object, STOP immediately and return that error. If it returns a success string, continue.
+2. Descriptions: Call `describe_entities_batch` ONCE using world gen results stored in context. If this tool returns an error object, STOP and return it. If it returns a success string, continue.
+3. Story Core: Call `generate_story_components` ONCE (intro + quest). If this tool returns an error object, STOP and return it. If it returns a success string, continue.
+4. Interactions: Call `craft_entity_interactions_batch` ONCE for key interactions. If this tool returns an error object, STOP and return it. If it returns a success string, continue.
+5. Final Compile: Call `complete_story` ONCE as the very last step. This tool *always* returns a `CompleteStoryResult` object (either success or containing an error field). Return this object directly.
+"""
+
+# Used when factory_game is unavailable and world generation is excluded.
+_FALLBACK_WORKFLOW_PROMPT = """
+1. Descriptions: Call `describe_entities_batch` ONCE based on a hypothetical world concept.
+2. Story Core: Call `generate_story_components` ONCE (intro + quest).
+3. Interactions: Call `craft_entity_interactions_batch` ONCE for key interactions.
+4. Final Compile: Call `complete_story` ONCE last. This returns the final object.
+"""
+
+
 class GameCopywriterAgent:
-    def __init__(self, openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")):
+    def __init__(self, openai_api_key: Optional[str] = None):
         logger.info("Initializing GameCopywriterAgent...")
         self.api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
@@ -1049,43 +1141,25 @@ class GameCopywriterAgent:
             self.sync_openai_client = OpenAI(api_key=self.api_key)
             logger.info("OpenAI client initialized.")
         except Exception as e:
-            logger.critical(f"Failed to initialize OpenAI client: {e}", exc_info=True)
+            logger.critical("Failed to initialize OpenAI client: %s", e, exc_info=True)
             raise  # Cannot proceed without a client
         self.agent = self._setup_agent()
-        logger.info(f"Agent '{self.agent.name}' setup complete (model: {getattr(self.agent, 'model', 'N/A')}).")
+        logger.info("Agent '%s' setup complete (model: %s).", self.agent.name, getattr(self.agent, 'model', 'N/A'))
 
     def _setup_agent(self) -> Agent:
-        system_prompt = f"""
-1. World Gen: Call `generate_complete_game_world` ONCE (map size {MAP_SIZE_RANGE[0]}-{MAP_SIZE_RANGE[1]}). If this tool returns an error object, STOP immediately and return that error. If it returns a success string, continue.
-2. Descriptions: Call `describe_entities_batch` ONCE using world gen results stored in context. If this tool returns an error object, STOP and return it. If it returns a success string, continue.
-3. Story Core: Call `generate_story_components` ONCE (intro + quest). If this tool returns an error object, STOP and return it. If it returns a success string, continue.
-4. Interactions: Call `craft_entity_interactions_batch` ONCE for key interactions. If this tool returns an error object, STOP and return it. If it returns a success string, continue.
-5. Final Compile: Call `complete_story` ONCE as the very last step. This tool *always* returns a `CompleteStoryResult` object (either success or containing an error field). Return this object directly.
-"""
-        tools = [
-            generate_complete_game_world,
-            get_entity_library,  # Keep for potential context/reference, though not in main workflow
-            describe_entities_batch,
-            craft_entity_interactions_batch,
-            generate_story_components,
-            complete_story
-        ]
+        system_prompt = _WORKFLOW_PROMPT
+        tools = _AGENT_TOOLS
         if not FACTORY_GAME_AVAILABLE:
             logger.warning("Excluding 'generate_complete_game_world' tool because 'factory_game' is missing.")
-            tools = [t for t in tools if t.__name__ != 'generate_complete_game_world']
+            tools = tuple(t for t in tools if t.name != 'generate_complete_game_world')
             if not tools:
                 raise RuntimeError("No tools available for agent after excluding world generation.")
-            system_prompt = f"""
-1. Descriptions: Call `describe_entities_batch` ONCE based on a hypothetical world concept.
-2. Story Core: Call `generate_story_components` ONCE (intro + quest).
-3. Interactions: Call `craft_entity_interactions_batch` ONCE for key interactions.
-4. Final Compile: Call `complete_story` ONCE last. This returns the final object.
-"""
+            system_prompt = _FALLBACK_WORKFLOW_PROMPT
 
         return Agent[CopywriterContext](
             name="Narrativa_Game_Writer",
             instructions=system_prompt,
-            tools=tools,
+            tools=list(tools),
             model=AGENT_MODEL
         )
 
@@ -1095,30 +1169,26 @@ class GameCopywriterAgent:
             logger.error("Agent has no tools configured.")
             return {"error": "Agent initialization failed: No tools available."}
 
-        logger.info(f"Starting agent processing for theme: '{theme}'")
+        logger.info("Starting agent processing for theme: '%s'", theme)
         initial_context = CopywriterContext(theme=theme)
 
-        runner = Runner()
-        runner.client = self.sync_openai_client  # Use the initialized synchronous client
-        runner.agent = self.agent
-        runner.context = initial_context
-
         input_msg = f"Generate the complete game narrative skeleton for the theme: '{theme}'. Adhere strictly to the defined workflow."
         if not FACTORY_GAME_AVAILABLE:
             input_msg += " Note: World generation is unavailable; proceed with the alternative workflow."
 
         try:
-            logger.info(
-                f"Running agent '{self.agent.name}' with model '{self.agent.model}'. Timeout: {AGENT_TIMEOUT_SECONDS}s")
+            logger.info("Running agent '%s' with model '%s'. Timeout: %ss",
+                        self.agent.name, self.agent.model, AGENT_TIMEOUT_SECONDS)
             run_result = await asyncio.wait_for(
-                runner.run(starting_agent=self.agent, input=input_msg),
+                Runner.run(starting_agent=self.agent, input=input_msg, context=initial_context),
                 timeout=AGENT_TIMEOUT_SECONDS
             )
             logger.info("Agent run finished.")
 
             final_output = getattr(run_result, 'final_output', None)
             return final_output
-        except Exception as e:
+        except Exception:
+            logger.exception("Agent run failed for theme '%s'", theme)
             return "error, please restart it"
 
     async def _reconstruct_result_from_context(self, context: Optional[CopywriterContext]) -> Optional[
@@ -1172,7 +1242,8 @@ class GameCopywriterAgent:
 
             if isinstance(final_result, CompleteStoryResult):
                 try:
-                    result_content = final_result.model_dump(mode='json', exclude_none=True)
+                    # Serialise straight to JSON text; it is written through the str branch below.
+                    result_content = final_result.model_dump_json(exclude_none=True, indent=2)
                 except Exception as dump_err:
                     logger.error(f"Failed to dump CompleteStoryResult model: {dump_err}")
                     result_content = {"error": "Failed to serialize CompleteStoryResult", "repr": repr(final_result)}
@@ -1188,11 +1259,10 @@ class GameCopywriterAgent:
 
             output_path = OUTPUT_DIR / result_filename
             try:
-                with open(output_path, "w", encoding="utf-8") as f:
-                    if isinstance(result_content, dict):
-                        json.dump(result_content, f, indent=2, ensure_ascii=False)
-                    elif isinstance(result_content, str):  # Handles the string case
-                        f.write(result_content)
+                if isinstance(result_content, dict):
+                    output_path.write_bytes(orjson.dumps(result_content, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+                elif isinstance(result_content, str):  # Handles the string case
+                    output_path.write_bytes(result_content.encode("utf-8"))
                 logger.info(f"✅ Final result saved: {output_path}")
             except TypeError as json_err:
                 logger.error(f"JSON serialization error saving result: {json_err}")
@@ -1209,9 +1279,7 @@ class GameCopywriterAgent:
             if context and isinstance(context, CopywriterContext):
                 context_path = OUTPUT_DIR / f"final_context_{ts}.json"
                 try:
-                    with open(context_path, "w", encoding="utf-8") as f_ctx:
-                        json.dump(context.model_dump(mode='json', exclude_none=True), f_ctx, indent=2,
-                                  ensure_ascii=False)
+                    context_path.write_bytes(_CONTEXT_ADAPTER.dump_json(context, exclude_none=True, indent=2))
                     logger.info(f"💾 Final context saved: {context_path}")
                 except Exception as e:
                     logger.error(f"Failed to save final context: {e}", exc_info=True)
@@ -1227,8 +1295,7 @@ class GameCopywriterAgent:
                         "run_object_type": type(run_info).__name__,
                         "final_output_type": type(getattr(run_info, 'final_output', None)).__name__,
                     }
-                    with open(run_info_path, "w", encoding="utf-8") as f_info:
-                        json.dump(info_dict, f_info, indent=2, default=str)  # Use default=str for safety
+                    run_info_path.write_bytes(orjson.dumps(info_dict, default=str, option=orjson.OPT_INDENT_2))  # Use default=str for safety
                     logger.info(f"📜 Basic run info saved: {run_info_path}")
                 except Exception as e:
                     logger.error(f"Failed to save run info: {e}")
@@ -1238,13 +1305,10 @@ class GameCopywriterAgent:
 
     def save_story_result(self, result: CompleteStoryResult) -> str:
         """Save the story result to a JSON file with timestamped filename."""
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        filename = f"{timestamp}-{result.theme}.json"
-        output_path = OUTPUT_DIR / filename
-        
+        output_path = OUTPUT_DIR / _story_filename(result.theme)
+
         try:
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(result.model_dump(mode='json', exclude_none=True), f, indent=2, ensure_ascii=False)
+            _write_story_json(result, output_path)
             logger.info(f"✅ Story result saved: {output_path}")
             return str(output_path)
         except Exception as e:
@@ -1310,7 +1374,11 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        import uvloop  # Optional: faster event loop for the CLI run when installed
+    except ImportError:
+        uvloop = None
+    try:
+        (uvloop.run if uvloop else asyncio.run)(main())
     except KeyboardInterrupt:
         print("\n🛑 Execution cancelled by user.")
     except Exception as startup_err:
@@ -1,18 +1,22 @@
 import asyncio  # Added for audio processing delays
 import heapq  # Add heapq import for PathFinder
+import itertools
 import json
 import logging
 import os
+import random
+import re
 import time
-from typing import Dict, Any, Tuple, Awaitable, Callable, List, Optional, Literal
-from collections import deque # Import deque for the message queue
+from typing import Dict, Any, Tuple, Awaitable, Callable, List, Optional, Literal, Set, Iterator
+from collections import OrderedDict
+from functools import lru_cache
 
 from fastapi import WebSocket
+import orjson
 from pydantic import BaseModel, Field, field_validator
-from pydantic.json_schema import models_json_schema
 
 from agent_copywriter_direct import Environment, CompleteStoryResult, Position
-from game_object import Container  # Added
+from game_object import Container, GameObject  # Added
 from prompt.storyteller_prompts import get_game_mechanics_reference, get_storyteller_system_prompt
 
 # Global movement command cache for duplicate detection
@@ -21,13 +25,15 @@ MOVEMENT_COMMAND_CACHE = {}
 # Max age in seconds for a cached command to be considered a duplicate
 MOVEMENT_CACHE_TTL = 3.0
 
+# Patterns used when reshaping free text into an AnswerSet
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.?!])\s+') # Split after punctuation + space
+_WORD_RE = re.compile(r'\b\w+\b')
+
 # Import shared logging utils
 
 try:
-    from openai import OpenAI, OpenAIError, BadRequestError, AssistantEventHandler, AsyncOpenAI
-    from openai.types.beta.threads import Run # Import Run for type hinting
+    from openai import OpenAIError, BadRequestError, AsyncOpenAI
     from openai.types.beta.threads.runs import ToolCall # Import ToolCall
-    from pydantic import BaseModel, Field, ValidationError
 except ImportError:
     print("\\nERROR: Could not import 'openai' or 'pydantic'.")
     print("Please install them (`pip install openai pydantic`).")
@@ -36,8 +42,6 @@ try:
     from deepgram import (
         DeepgramClient,
         PrerecordedOptions,
-        FileSource,
-        DeepgramClientOptions
     )
 except ImportError:
     print("\\nERROR: Could not import 'deepgram'.")
@@ -68,8 +72,9 @@ if DEBUG_MODE:
 # We might keep the helper functions if they are generally useful
 
 # Helper to get tool schemas
+@lru_cache(maxsize=1)
 def get_tool_schemas() -> List[Dict[str, Any]]:
-    """Generates the JSON schemas for all available tools."""
+    """Generates the JSON schemas for all available tools (built once, then served from cache)."""
     # Manually define schemas for each tool function
     # This could potentially be automated using pydantic or inspect
     # but manual definition ensures correctness for the Assistants API.
@@ -235,6 +240,13 @@ def get_tool_schemas() -> List[Dict[str, Any]]:
     return schemas
 
 
+# Shared OpenAI client per API key, so every session reuses one connection pool
+@lru_cache(maxsize=4)
+def get_openai_client(api_key: str) -> AsyncOpenAI:
+    """Returns the process-wide AsyncOpenAI client for the given API key."""
+    return AsyncOpenAI(api_key=api_key)
+
+
 
 # --- Model Definitions ---
 
@@ -632,7 +644,7 @@ class DirectionHelper:
         return final_message
 
 
-# --- sync_story_state, get_weight_description, PathNode, PathFinder ---
+# --- sync_story_state, get_weight_description, PathFinder ---
 # (Keep these helper classes/functions as they are used internally)
 def sync_story_state(story_result: CompleteStoryResult):
     """Synchronize the story state (environment maps, nearby objects) using Environment methods.
@@ -919,30 +931,37 @@ def get_weight_description(weight: int) -> str:
     return "extremely heavy"
 
 
-class PathNode:
-    """Node used in the A* path-finding algorithm."""
+# LRU of recent find_path results keyed by (environment version, start, end)
+_PATH_CACHE: "OrderedDict[Tuple[int, Tuple[int, int], Tuple[int, int]], Tuple[Tuple[int, int], ...]]" = OrderedDict()
+_PATH_CACHE_SIZE = 4096
+
+# Cardinal steps in up, right, down, left order (y grows downwards)
+_DIRS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
 
-    def __init__(self, position, parent=None):
-        self.position: Tuple[int, int] = position  # (x, y) tuple
-        self.parent: Optional[PathNode] = parent  # parent PathNode
-        self.g: int = 0  # cost from start to current node
-        self.h: int = 0  # heuristic (estimated cost from current to goal)
-        self.f: int = 0  # total cost (g + h)
+class _PathMask:
+    """Walkable cells and jumpable-object tiles, snapshotted once per path query."""
 
-    def __eq__(self, other):
-        if not isinstance(other, PathNode):
-            return NotImplemented
-        return self.position == other.position
+    __slots__ = ("width", "height", "grid", "jumpable")
 
-    def __lt__(self, other):
-        if not isinstance(other, PathNode):
-            return NotImplemented
-        if self.f != other.f:
-            return self.f < other.f
-        return self.h < other.h
+    def __init__(self, environment: Environment):
+        self.width = environment.width
+        self.height = environment.height
+        self.grid = environment.grid  # 1 = traversable, the same cells can_move_to reads
+        self.jumpable: Set[Tuple[int, int]] = set()
+        for pos, entities in environment.position_map.items():
+            if not self.in_bounds(*pos):
+                continue
+            # Mirrors get_object_at: the first GameObject on the tile decides
+            obj = next((e for e in entities if isinstance(e, GameObject)), None)
+            if obj is not None and getattr(obj, 'is_jumpable', False):
+                self.jumpable.add(pos)
 
-    def __hash__(self):
-        return hash(self.position)
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def can_move_to(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and self.grid[y][x] == 1
 
 
 class PathFinder:
@@ -955,29 +974,13 @@ class PathFinder:
         return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
 
     @staticmethod
-    def get_neighbors(
-        position: Tuple[int, int], environment: Environment) -> List[Tuple[int, int]]:
-        """Get valid, movable neighboring positions (cardinal directions only).
-
-        Uses coordinate system where:
-        - (0, -1): Up (decrease Y)
-        - (1, 0): Right (increase X)
-        - (0, 1): Down (increase Y)
-        - (-1, 0): Left (decrease X)
-        """
-        x, y = position
-        neighbors = []
-        for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
-            new_pos = (x + dx, y + dy)
-            if environment.is_valid_position(
-                new_pos) and environment.can_move_to(new_pos):
-                neighbors.append(new_pos)
-        return neighbors
+    def _successors(
+        position: Tuple[int, int], mask: _PathMask) -> Iterator[Tuple[Tuple[int, int], int]]:
+        """Yield (position, move cost) for every tile reachable in one move.
 
-    @staticmethod
-    def get_jump_neighbors(
-        position: Tuple[int, int], environment: Environment) -> List[Tuple[int, int]]:
-        """Get positions reachable by jumping from the current position.
+        Plain moves onto walkable cardinal neighbours cost 1; jumping over a jumpable
+        object onto the walkable tile behind it costs 5. All moves are yielded before
+        any jump so ties in the search resolve the same way as before.
 
         Uses coordinate system where:
         - (0, -1): Up (decrease Y)
@@ -986,20 +989,13 @@ class PathFinder:
         - (-1, 0): Left (decrease X)
         """
         x, y = position
-        jump_neighbors = []
-        for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
-            middle_pos = (x + dx, y + dy)
-            landing_pos = (x + 2 * dx, y + 2 * dy)
-
-            if environment.is_valid_position(
-                middle_pos) and environment.is_valid_position(landing_pos):
-                middle_obj = environment.get_object_at(middle_pos)
-                if middle_obj and getattr(
-    middle_obj,
-    'is_jumpable',
-     False) and environment.can_move_to(landing_pos):
-                    jump_neighbors.append(landing_pos)
-        return jump_neighbors
+        for dx, dy in _DIRS:
+            if mask.can_move_to(x + dx, y + dy):
+                yield (x + dx, y + dy), 1
+        for dx, dy in _DIRS:
+            # Jumpable tiles are always in bounds, so only the landing needs checking
+            if (x + dx, y + dy) in mask.jumpable and mask.can_move_to(x + 2 * dx, y + 2 * dy):
+                yield (x + 2 * dx, y + 2 * dy), 5
 
     @staticmethod
     def find_path(environment: Environment, start_pos: Tuple[int, int], end_pos: Tuple[int, int]) -> List[
@@ -1017,57 +1013,67 @@ class PathFinder:
         if start_pos == end_pos:
              return [start_pos]
 
-        start_node = PathNode(start_pos)
-        end_node = PathNode(end_pos)
+        # The version changes whenever an entity is added, removed or moved, so a hit
+        # can only come from an identical layout
+        key = (environment.version, start_pos, end_pos)
+        cached = _PATH_CACHE.get(key)
+        if cached is not None:
+            _PATH_CACHE.move_to_end(key)
+            logger.debug("PATHFINDER: Served path from cache.")
+            return list(cached)
+
+        path = PathFinder._a_star(environment, start_pos, end_pos)
+        _PATH_CACHE[key] = tuple(path)
+        if len(_PATH_CACHE) > _PATH_CACHE_SIZE:
+            _PATH_CACHE.popitem(last=False)
+        return path
 
-        open_list = []  # Priority queue (min-heap)
+    @staticmethod
+    def _a_star(environment: Environment, start_pos: Tuple[int, int], end_pos: Tuple[int, int]) -> List[
+        Tuple[int, int]]:
+        """Uncached A* search between two distinct, valid positions."""
+        # Heap entries are (f, h, tiebreak, position): lowest f first, ties go to the node
+        # closer to the goal, and the counter keeps ties from ever comparing positions.
+        open_list = [(PathFinder.manhattan_distance(start_pos, end_pos), 0, 0, start_pos)]
         closed_set = set()  # Set of visited positions
-
-        heapq.heappush(open_list, start_node)
+        best_g = {start_pos: 0}  # Cheapest known cost per position, replaces scanning open_list
+        parent = {start_pos: None}  # Predecessor on the cheapest known route
+        tiebreak = itertools.count(1)
+        mask = _PathMask(environment)  # Built once; neighbour checks become plain lookups
 
         while open_list:
-            current_node = heapq.heappop(open_list)
+            current_pos = heapq.heappop(open_list)[3]
 
-            if current_node.position in closed_set:
+            if current_pos in closed_set:
                 continue  # Already processed this position via a better path
-            closed_set.add(current_node.position)
+            closed_set.add(current_pos)
 
-            if current_node.position == end_node.position:
+            if current_pos == end_pos:
                 path = []
-                temp = current_node
-                while temp:
-                    path.append(temp.position)
-                    temp = temp.parent
+                temp = current_pos
+                while temp is not None:
+                    path.append(temp)
+                    temp = parent[temp]
                 logger.debug(
                     f"PATHFINDER: Path found with {len(path) - 1} steps.")
                 return path[::-1]  # Return reversed path
 
-            neighbors_pos = PathFinder.get_neighbors(
-                current_node.position, environment)
-            jump_neighbors_pos = PathFinder.get_jump_neighbors(
-                current_node.position, environment)
+            # The first pop of a position is its cheapest entry, so best_g holds its cost
+            current_g = best_g[current_pos]
 
-            for neighbor_pos in neighbors_pos + jump_neighbors_pos:
+            for neighbor_pos, move_cost in PathFinder._successors(current_pos, mask):
                 if neighbor_pos in closed_set:
                     continue
 
-                # Jump costs 5, move costs 1
-                move_cost = 5 if neighbor_pos in jump_neighbors_pos else 1
-                new_g = current_node.g + move_cost
+                new_g = current_g + move_cost
 
-                existing_node = next(
-    (node for node in open_list if node.position == neighbor_pos), None)
-
-                if existing_node and new_g >= existing_node.g:
+                if new_g >= best_g.get(neighbor_pos, float('inf')):
                     continue  # Found a better or equal path already
+                best_g[neighbor_pos] = new_g
+                parent[neighbor_pos] = current_pos
 
-                neighbor_node = PathNode(neighbor_pos, current_node)
-                neighbor_node.g = new_g
-                neighbor_node.h = PathFinder.manhattan_distance(
-                    neighbor_pos, end_pos)
-                neighbor_node.f = neighbor_node.g + neighbor_node.h
-
-                heapq.heappush(open_list, neighbor_node)
+                h = PathFinder.manhattan_distance(neighbor_pos, end_pos)
+                heapq.heappush(open_list, (new_g + h, h, next(tiebreak), neighbor_pos))
 
         logger.warning("PATHFINDER: No path found.")
         return []  # No path found
@@ -1663,7 +1669,7 @@ async def move_to_object(
 
     # Find adjacent positions where player can stand
     adjacent_candidates = []
-    for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:  # Up, Right, Down, Left
+    for dx, dy in _DIRS:  # Up, Right, Down, Left
         adj_pos = (target_pos[0] + dx, target_pos[1] + dy)
         if environment.is_valid_position(
             adj_pos) and environment.can_move_to(adj_pos):
@@ -2011,11 +2017,9 @@ class StorytellerAgentFinal:
         
         # Initialize OpenAI client (AsyncOpenAI for async operations)
         try:
-            from openai import AsyncOpenAI
-            self.openai_client = AsyncOpenAI(api_key=self.openai_api_key)
-            # --- ADDED: Initialize separate client for TTS specifically ---
-            # This avoids potential conflicts if Assistant API uses client differently
-            self.openai_tts_client = AsyncOpenAI(api_key=self.openai_api_key)
+            self.openai_client = get_openai_client(self.openai_api_key)
+            # The client holds no per-conversation state, so TTS shares it too
+            self.openai_tts_client = self.openai_client
             logger.info("✅ Initialized AsyncOpenAI clients (Assistant & TTS)")
         except Exception as e:
             logger.error(f"❌ Failed to initialize OpenAI client: {e}")
@@ -2164,7 +2168,7 @@ class StorytellerAgentFinal:
         for tool_call in tool_calls:
             tool_name = tool_call.function.name
             tool_id = tool_call.id
-            tool_args = json.loads(tool_call.function.arguments)
+            tool_args = orjson.loads(tool_call.function.arguments)
             logger.info(f"Tool arguments: {tool_args}")
             parsed_tools.append({"id": tool_id, "name": tool_name, "args": tool_args})
         
@@ -2241,16 +2245,17 @@ class StorytellerAgentFinal:
                     logger.error(f"❌ {error_msg}")
                     
                     # If this is a consolidated command, need to provide output for all IDs
+                    output = orjson.dumps({"error": error_msg}).decode()
                     if "combined_ids" in tool_info:
                         for combined_id in tool_info["combined_ids"]:
                             tool_outputs.append({
                                 "tool_call_id": combined_id,
-                                "output": json.dumps({"error": error_msg})
+                                "output": output
                             })
                     else:
                         tool_outputs.append({
                             "tool_call_id": tool_id,
-                            "output": json.dumps({"error": error_msg})
+                            "output": output
                         })
                     continue
                 
@@ -2268,16 +2273,17 @@ class StorytellerAgentFinal:
                 logger.info(f"📝 Tool execution result: {result}")
                 
                 # If this is a consolidated command, provide the result to all IDs
+                output = orjson.dumps({"result": result}, option=orjson.OPT_NON_STR_KEYS).decode() # Encoded once, shared by combined ids
                 if "combined_ids" in tool_info:
                     for combined_id in tool_info["combined_ids"]:
                         tool_outputs.append({
                             "tool_call_id": combined_id,
-                            "output": json.dumps({"result": result})
+                            "output": output
                         })
                 else:
                     tool_outputs.append({
                         "tool_call_id": tool_id,
-                        "output": json.dumps({"result": result})
+                        "output": output
                     })
                 
                 # If this is a movement command, send it to the frontend
@@ -2360,16 +2366,17 @@ class StorytellerAgentFinal:
                 logger.error(f"❌ {error_msg}", exc_info=True)
                 
                 # If this is a consolidated command, provide the error to all IDs
+                output = orjson.dumps({"error": error_msg}).decode()
                 if "combined_ids" in tool_info:
                     for combined_id in tool_info["combined_ids"]:
                         tool_outputs.append({
                             "tool_call_id": combined_id,
-                            "output": json.dumps({"error": error_msg})
+                            "output": output
                         })
                 else:
                     tool_outputs.append({
                         "tool_call_id": tool_id,
-                        "output": json.dumps({"error": error_msg})
+                        "output": output
                     })
         
         # Submit all tool outputs at once
@@ -2543,7 +2550,7 @@ class StorytellerAgentFinal:
                 # Check if response contains valid JSON
                 try:
                     if response_text.strip().startswith('{') and "answers" in response_text:
-                        json_data = json.loads(response_text)
+                        json_data = orjson.loads(response_text)
                         final_response = {"type": "json", "content": json_data}
                     else:
                         # Format as AnswerSet if not already
@@ -2566,7 +2573,7 @@ class StorytellerAgentFinal:
                         # Send JSON response to frontend
                         await self.websocket.send_text(json.dumps(final_response))
 
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     # Not valid JSON, just format as AnswerSet
                     formatted_answer = self._format_as_answer_set(response_text)
                     final_response = {"type": "json", "content": formatted_answer}
@@ -2608,8 +2615,7 @@ class StorytellerAgentFinal:
         """
         try:
             # 1. Split text into sentences using regex (handles ., ?, !)
-            import re
-            sentences = re.split(r'(?<=[.?!])\s+', text.strip()) # Split after punctuation + space
+            sentences = _SENTENCE_SPLIT_RE.split(text.strip())
             # Filter out any empty strings resulting from the split
             sentences = [s.strip() for s in sentences if s.strip()]
 
@@ -2622,7 +2628,7 @@ class StorytellerAgentFinal:
                 }]}
 
             # 2. Generate options based on the *entire original text* for context
-            original_text_words = re.findall(r'\b\w+\b', text.lower())
+            original_text_words = _WORD_RE.findall(text.lower())
             action_words = [w for w in original_text_words if len(w) > 3 and w not in
                            {'this', 'that', 'with', 'from', 'have', 'what', 'when', 'where',
                             'there', 'their', 'about', 'would', 'could', 'should'}]
@@ -2637,7 +2643,6 @@ class StorytellerAgentFinal:
 
             if len(action_words) >= 3:
                 action_words = list(set(action_words))
-                import random
                 random.shuffle(action_words)
                 if len(generated_options) < 3 and len(action_words) >= 2:
                     generated_options.append(f"{action_words[0].capitalize()} {action_words[1]}")
@@ -2720,14 +2725,16 @@ class StorytellerAgentFinal:
             
             # The Deepgram SDK might have changed - fix the await pattern
             try:
-                # First try the async method (newer SDK versions)
-                dg_response = await self.deepgram_client.listen.prerecorded.v("1").transcribe_file(source, options)
+                # First try the async REST client (SDK >= 3.4); prerecorded.v("1") is the
+                # blocking client, so awaiting it ran the request once and then failed
+                dg_response = await self.deepgram_client.listen.asyncrest.v("1").transcribe_file(source, options)
                 transcribed_text = dg_response.results.channels[0].alternatives[0].transcript
             except Exception as deepgram_err:
                 # If that fails, try the sync method or handle differently
                 logger.warning(f"⚠️ Error with async Deepgram transcription, trying alternative approach: {deepgram_err}")
-                # Try calling without await if it's not an awaitable function
-                dg_response = self.deepgram_client.listen.prerecorded.v("1").transcribe_file(source, options)
+                # Run the blocking client in a worker thread so the websocket loop keeps serving
+                dg_response = await asyncio.to_thread(
+                    self.deepgram_client.listen.prerecorded.v("1").transcribe_file, source, options)
                 
                 # Properly extract transcription from the response object
                 if hasattr(dg_response, 'results') and hasattr(dg_response.results, 'channels'):
@@ -2,7 +2,8 @@ import math
 import uuid
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import List, Set, Dict, Any, Literal, Tuple
+from functools import lru_cache
+from typing import List, Set, Dict, Any, Literal, Optional, Tuple
 
 import numpy as np
 from colorama import Fore, Back, Style, init
@@ -20,6 +21,11 @@ LAND_SYMBOL = 1
 
 VERSION = "2.0"  # Removed landmark and NPC functionality
 
+
+def _id_suffix() -> str:
+    """Return a short random hex suffix for object ids (32 bits, unlike the old 4-digit range)."""
+    return uuid.uuid4().hex[:8]
+
 def create_game(map_size: int = MAP_SIZE, 
                 border_size: int = BORDER_SIZE,
                 chest_count: int = 5,
@@ -71,7 +77,8 @@ def create_game(map_size: int = MAP_SIZE,
     return world
 
 def generate_perlin_noise(width: int, height: int, scale: float = 10.0, octaves: int = 6, 
-                          persistence: float = 0.5, lacunarity: float = 2.0) -> np.ndarray:
+                          persistence: float = 0.5, lacunarity: float = 2.0,
+                          seed: Optional[int] = None) -> np.ndarray:
     """
     Generate a 2D Perlin noise map.
     
@@ -82,33 +89,33 @@ def generate_perlin_noise(width: int, height: int, scale: float = 10.0, octaves:
         octaves: Number of layers of noise
         persistence: How much each octave contributes
         lacunarity: How much detail is added per octave
+        seed: Optional seed for a reproducible map; None uses the global numpy RNG
         
     Returns:
         2D numpy array of noise values between 0 and 1
     """
     noise_map = np.zeros((height, width))
     
-    random_grid = np.random.rand(height, width)
+    if seed is None:
+        random_grid = np.random.rand(height, width)
+    else:
+        random_grid = np.random.default_rng(seed).random((height, width))
     
-    for y in range(height):
-        for x in range(width):
-            nx = x / width
-            ny = y / height
-            
-            frequency = 1
-            amplitude = 1
-            noise_value = 0
-            
-            for i in range(octaves):
-                sample_x = int((nx * frequency * scale) % width)
-                sample_y = int((ny * frequency * scale) % height)
-                
-                noise_value += random_grid[sample_y, sample_x] * amplitude
-                
-                amplitude *= persistence
-                frequency *= lacunarity
-            
-            noise_map[y, x] = noise_value
+    # Sample whole rows/columns per octave instead of walking every cell
+    nx = np.arange(width) / width
+    ny = np.arange(height) / height
+    
+    frequency = 1
+    amplitude = 1
+    
+    for i in range(octaves):
+        sample_x = ((nx * frequency * scale) % width).astype(np.intp)
+        sample_y = ((ny * frequency * scale) % height).astype(np.intp)
+        
+        noise_map += random_grid[np.ix_(sample_y, sample_x)] * amplitude
+        
+        amplitude *= persistence
+        frequency *= lacunarity
     
     min_val = np.min(noise_map)
     max_val = np.max(noise_map)
@@ -128,59 +135,52 @@ def create_distance_map(width: int, height: int, method: Literal["square_bump",
     Returns:
         2D numpy array of distance values between 0 and 1
     """
-    distance_map = np.zeros((height, width))
+    nx = (2 * np.arange(width) / width - 1)[np.newaxis, :]
+    ny = (2 * np.arange(height) / height - 1)[:, np.newaxis]
     
-    for y in range(height):
-        for x in range(width):
-            nx = 2 * x / width - 1
-            ny = 2 * y / height - 1
-            
-            if method == "square_bump":
-                distance_map[y, x] = 1 - (1 - nx**2) * (1 - ny**2)
-            else:
-                distance_map[y, x] = min(1, (nx**2 + ny**2) / math.sqrt(2))
+    if method == "square_bump":
+        distance_map = 1 - (1 - nx**2) * (1 - ny**2)
+    else:
+        distance_map = np.minimum(1, (nx**2 + ny**2) / math.sqrt(2))
     
     return distance_map
 
-def generate_island_map(size: int = MAP_SIZE, border_size: int = BORDER_SIZE) -> List[List[int]]:
+def generate_island_map(size: int = MAP_SIZE, border_size: int = BORDER_SIZE,
+                        seed: Optional[int] = None) -> List[List[int]]:
     """
     Generate a map with islands surrounded by water.
     
     Args:
         size: Size of the map (square)
         border_size: Size of the water border
+        seed: Optional seed; seeded maps are deterministic and memoised
         
     Returns:
         2D list of strings representing the map
     """
+    if seed is None:
+        return _island_grid(size, border_size).tolist()
+    # tolist() hands every caller its own copy of the cached grid
+    return _seeded_island_grid(size, border_size, seed).tolist()
+
+@lru_cache(maxsize=32)
+def _seeded_island_grid(size: int, border_size: int, seed: int) -> np.ndarray:
+    grid = _island_grid(size, border_size, seed)
+    grid.flags.writeable = False
+    return grid
+
+def _island_grid(size: int, border_size: int, seed: Optional[int] = None) -> np.ndarray:
     inner_size = size - 2 * border_size
-    noise = generate_perlin_noise(inner_size, inner_size)
+    noise = generate_perlin_noise(inner_size, inner_size, seed=seed)
     
     distance = create_distance_map(inner_size, inner_size, "square_bump")
     
     mix = 0.65  # Control how much of the distance affects the final value
-    shaped_elevation = np.zeros_like(noise)
-    for y in range(inner_size):
-        for x in range(inner_size):
-            d = distance[y, x]
-            e = noise[y, x]
-            shaped_elevation[y, x] = e * (1 - mix) + (1 - d) * mix
-    
-    map_grid = []
-    for y in range(size):
-        row = []
-        for x in range(size):
-            if (y < border_size or y >= size - border_size or 
-                x < border_size or x >= size - border_size):
-                row.append(WATER_SYMBOL)
-            else:
-                inner_x = x - border_size
-                inner_y = y - border_size
-                if shaped_elevation[inner_y, inner_x] >= WATER_LEVEL:
-                    row.append(LAND_SYMBOL)
-                else:
-                    row.append(WATER_SYMBOL)
-        map_grid.append(row)
+    shaped_elevation = noise * (1 - mix) + (1 - distance) * mix
+    
+    map_grid = np.full((size, size), WATER_SYMBOL, dtype=np.int64)
+    map_grid[border_size:size - border_size, border_size:size - border_size] = np.where(
+        shaped_elevation >= WATER_LEVEL, LAND_SYMBOL, WATER_SYMBOL)
     
     return map_grid
 
@@ -277,7 +277,7 @@ class BackpackFactory:
             raise ValueError(f"Invalid backpack variant: {variant}. Valid variants are: {valid_variants}")
             
         if id is None:
-            id = f"backpack_{variant}_{random.randint(1000, 9999)}"
+            id = f"backpack_{variant}_{_id_suffix()}"
             
         backpack = Backpack(
             id=id,
@@ -364,7 +364,7 @@ class BedrollFactory:
             raise ValueError(f"Invalid bedroll variant: {variant}. Valid variants are: {valid_variants}")
             
         if id is None:
-            id = f"bedroll_{variant}_{random.randint(1000, 9999)}"
+            id = f"bedroll_{variant}_{_id_suffix()}"
             
         bedroll = Bedroll(
             id=id,
@@ -473,7 +473,7 @@ class CampfirePotFactory:
             raise ValueError(f"Invalid pot type: {pot_type}. Valid types are: {valid_types}")
             
         if id is None:
-            id = f"pot_{pot_type}_{random.randint(1000, 9999)}"
+            id = f"pot_{pot_type}_{_id_suffix()}"
             
         pot = CampfirePot(
             id=id,
@@ -596,7 +596,7 @@ class SpitItemFactory:
             raise ValueError(f"Invalid item type: {item_type}. Valid types are: {valid_types}")
             
         if id is None:
-            id = f"spit_item_{item_type}_{random.randint(1000, 9999)}"
+            id = f"spit_item_{item_type}_{_id_suffix()}"
             
         item = SpitItem(
             id=id,
@@ -707,7 +707,7 @@ class CampfireSpitFactory:
             raise ValueError(f"Invalid quality level: {quality}. Valid qualities are: {valid_qualities}")
             
         if id is None:
-            id = f"campfire_spit_{quality}_{random.randint(1000, 9999)}"
+            id = f"campfire_spit_{quality}_{_id_suffix()}"
             
         spit = CampfireSpit(
             id=id,
@@ -816,7 +816,7 @@ class CampfireFactory:
             raise ValueError(f"Invalid campfire state: {state}. Valid states are: {valid_states}")
             
         if id is None:
-            id = f"campfire_{state}_{random.randint(1000, 9999)}"
+            id = f"campfire_{state}_{_id_suffix()}"
             
         campfire = Campfire(
             id=id,
@@ -1190,7 +1190,7 @@ class FirewoodFactory:
             raise ValueError(f"Invalid firewood variant: {variant}. Valid variants are: {valid_variants}")
             
         if id is None:
-            id = f"firewood_{variant}_{random.randint(1000, 9999)}"
+            id = f"firewood_{variant}_{_id_suffix()}"
             
         firewood = Firewood(
             id=id,
@@ -1292,7 +1292,7 @@ class LandObstacleFactory:
         rock_props = rock_properties.get(rock_type, rock_properties["boulder"])
         
         return GameObject(
-            id=f"{rock_type}_{random.randint(1000, 9999)}",
+            id=f"{rock_type}_{_id_suffix()}",
             is_jumpable=True,
             **rock_props,
             **props
@@ -1362,7 +1362,7 @@ class LandObstacleFactory:
                 final_props[key] = value
         
         return GameObject(
-            id=f"{plant_type}_{random.randint(1000, 9999)}",
+            id=f"{plant_type}_{_id_suffix()}",
             is_jumpable=True,
             **final_props
         )
@@ -1371,7 +1371,7 @@ class LandObstacleFactory:
     def create_chestnut_tree(**props) -> GameObject:
         """Create a chestnut tree obstacle that cannot be jumped over."""
         return GameObject(
-            id=f"chestnut_tree_{random.randint(1000, 9999)}",
+            id=f"chestnut_tree_{_id_suffix()}",
             name="Chestnut Tree",
             is_jumpable=False,  # Explicitly not jumpable as requested
             is_movable=False,
@@ -1497,7 +1497,7 @@ class LogStoolFactory:
             raise ValueError(f"Invalid stool variant: {variant}. Valid variants are: {valid_variants}")
             
         if id is None:
-            id = f"stool_{variant}_{random.randint(1000, 9999)}"
+            id = f"stool_{variant}_{_id_suffix()}"
             
         stool = LogStool(
             id=id,
@@ -1673,7 +1673,7 @@ class PotFactory:
             raise ValueError(f"Invalid pot state: {state}. Valid states are: {valid_states_str}")
             
         if id is None:
-            id = f"pot_{size}_{random.randint(1000, 9999)}"
+            id = f"pot_{size}_{_id_suffix()}"
         
         data = cls._pot_data[size]
         pot = Pot(
@@ -1786,7 +1786,7 @@ class TentFactory:
             raise ValueError(f"Invalid tent variant: {variant}. Valid variants are: {valid_variants}")
             
         if id is None:
-            id = f"tent_{variant}_{random.randint(1000, 9999)}"
+            id = f"tent_{variant}_{_id_suffix()}"
             
         tent = Tent(
             id=id,
@@ -2036,6 +2036,10 @@ class GameFactory:
             "pots": []
         }
 
+    def _occupied_positions(self) -> Set[Tuple[int, int]]:
+        """Return the set of tiles already holding a placed object."""
+        return {obj["position"] for obj_list in self.objects.values() for obj in obj_list}
+
     def find_valid_player_position(self) -> Tuple[int, int]:
         """
         Find a valid starting position for the player that:
@@ -2046,6 +2050,7 @@ class GameFactory:
         Returns:
             Tuple[int, int]: A valid (x, y) position for the player
         """
+        occupied = self._occupied_positions()
         land_tiles = []
         for y in range(self.map_size):
             for x in range(self.map_size):
@@ -2053,18 +2058,8 @@ class GameFactory:
                    x < self.border_size or x >= self.map_size - self.border_size:
                     continue
                 
-                if self.map_grid[y][x] == "$$$":
-                    occupied = False
-                    for obj_type, obj_list in self.objects.items():
-                        for obj in obj_list:
-                            if obj["position"] == (x, y):
-                                occupied = True
-                                break
-                        if occupied:
-                            break
-                    
-                    if not occupied:
-                        land_tiles.append((x, y))
+                if self.map_grid[y][x] == "$$$" and (x, y) not in occupied:
+                    land_tiles.append((x, y))
         
         random.shuffle(land_tiles)
         
@@ -2081,19 +2076,9 @@ class GameFactory:
                     
                     if (new_x >= self.border_size and new_x < self.map_size - self.border_size and
                         new_y >= self.border_size and new_y < self.map_size - self.border_size and
-                        self.map_grid[new_y][new_x] == "$$$"):
-                        
-                        occupied = False
-                        for obj_type, obj_list in self.objects.items():
-                            for obj in obj_list:
-                                if obj["position"] == (new_x, new_y):
-                                    occupied = True
-                                    break
-                            if occupied:
-                                break
-                        
-                        if not occupied:
-                            free_positions += 1
+                        self.map_grid[new_y][new_x] == "$$$" and
+                        (new_x, new_y) not in occupied):
+                        free_positions += 1
             
             if free_positions >= 5:
                 return (x, y)
@@ -2169,7 +2154,7 @@ class GameFactory:
             "type": landmark_type,
             "name": f"{landmark_type.capitalize()}",
             "special": is_special,
-            "id": f"landmark_{landmark_type}_{random.randint(1000, 9999)}"
+            "id": f"landmark_{landmark_type}_{_id_suffix()}"
         }
         
         if landmark_type == "tower":
@@ -2266,7 +2251,7 @@ class GameFactory:
         is_hostile = random.random() < hostile_chance.get(npc_type, 0.1)
         
         npc = {
-            "id": f"npc_{npc_type}_{random.randint(1000, 9999)}",
+            "id": f"npc_{npc_type}_{_id_suffix()}",
             "type": npc_type,
             "name": f"{npc_type.capitalize()}",  # Could be expanded with name generation
             "level": random.randint(1, 5),
@@ -2284,7 +2269,7 @@ class GameFactory:
             npc["inventory"].append({
                 "type": item_type,
                 "quantity": quantity,
-                "id": f"item_{item_type}_{random.randint(1000, 9999)}"
+                "id": f"item_{item_type}_{_id_suffix()}"
             })
             
         return npc
@@ -2299,6 +2284,7 @@ class GameFactory:
         """
         self.objects[object_type] = []
         
+        occupied = self._occupied_positions()
         land_tiles = []
         for y in range(self.map_size):
             for x in range(self.map_size):
@@ -2306,18 +2292,8 @@ class GameFactory:
                    x < self.border_size or x >= self.map_size - self.border_size:
                     continue
                 
-                if self.map_grid[y][x] == "$$$":
-                    occupied = False
-                    for obj_type, obj_list in self.objects.items():
-                        for obj in obj_list:
-                            if obj["position"] == (x, y):
-                                occupied = True
-                                break
-                        if occupied:
-                            break
-                    
-                    if not occupied:
-                        land_tiles.append((x, y))
+                if self.map_grid[y][x] == "$$$" and (x, y) not in occupied:
+                    land_tiles.append((x, y))
         
         random.shuffle(land_tiles)
         
@@ -9,10 +9,11 @@ import json
 import os
 import time
 from pathlib import Path
-from typing import Dict, Any, List, Tuple, Callable, Awaitable, Optional
+from typing import Dict, Any
 import traceback
 
 # print("DEBUG: Importing agent_storyteller_final...") # DEBUG - Removed
+import orjson
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -184,7 +185,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     print(f"Audio buffer size now: {len(session_data['audio_buffer'])} bytes")
             elif "text" in message:
                 try:
-                    data = json.loads(message["text"])
+                    data = orjson.loads(message["text"])
                     print(f"Received message: {data} | Theme Loaded? {session_data['copywriter_done']}")
 
                     # Handle theme selection before copywriter is done
@@ -219,9 +220,8 @@ async def websocket_endpoint(websocket: WebSocket):
                             continue  # Wait for a valid theme
 
                         try:
-                            with open(map_file_path, "r") as f:
-                                game_data = json.load(f)
-                        except json.JSONDecodeError:
+                            game_data = orjson.loads(map_file_path.read_bytes())
+                        except orjson.JSONDecodeError:
                             print(f"Error: Could not decode JSON from {map_file_path}")
                             await websocket.send_text(json.dumps({
                                 "type": "error",
@@ -290,7 +290,8 @@ async def websocket_endpoint(websocket: WebSocket):
                             },
                             "sender": "system"
                         }
-                        await websocket.send_text(json.dumps(map_create_command))
+                        # The map payload carries the full grid; orjson serialises it far faster than json.
+                        await websocket.send_text(orjson.dumps(map_create_command).decode("utf-8"))
                         print("Sent create_map command to frontend.")
 
                         # --- Start the StorytellerAgent (init AI & send first message) THIRD --- 
@@ -399,7 +400,7 @@ async def websocket_endpoint(websocket: WebSocket):
                             "content": "Unrecognized message type.",
                             "sender": "system"
                         }))
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     try:
                         await websocket.send_text(json.dumps({
                             "type": "error",
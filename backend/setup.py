@@ -10,6 +10,8 @@ setup(
         "websockets",
         "openai",
         "deepgram-sdk",
-        "colorama"
+        "colorama",
+        "orjson",
+        "pydantic>=2"
     ]
 ) 
\ No newline at end of file
@@ -11,6 +11,8 @@ setup(
         "openai",
         "deepgram-sdk",
         "colorama",
-        "numpy"
+        "numpy",
+        "orjson",
+        "pydantic>=2"
     ]
 ) 
\ No newline at end of file